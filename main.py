@@ -1,9 +1,30 @@
-from collections import UserDict
-from datetime import datetime, date, timedelta
+from datetime import date
 from functools import wraps
+import atexit
+import json
+import os
 import pickle
+import sys
+
+try:
+    import readline # gives input() history and tab-completion; not available on Windows
+except ImportError:
+    readline = None
+
+HISTORY_FILE = os.path.expanduser("~/.addressbook_history")
+
+# zero-padded day and month strings, looked up by number when dates are formatted as DD.MM.YYYY
+_DD = [f"{i:02d}" for i in range(32)]
+_MM = [f"{i:02d}" for i in range(13)]
+
+# formats date as DD.MM.YYYY without going through strftime format parsing.
+# Year is padded to 4 digits, so the result can always be parsed back by Birthday
+def _format_date(value: date):
+    return _DD[value.day] + "." + _MM[value.month] + "." + str(value.year).zfill(4)
 
 class Field:
+    __slots__ = ("value",) # value is kept in a slot instead of per-instance __dict__
+
     def __init__(self, value):
         self.value = value
 
@@ -19,16 +40,27 @@ class Field:
     
     # defining the method to ensure correct serialization of value
     def __getstate__(self):
-        return self.__dict__
+        return {"value": self.value}
     
-    # defining the method to ensure correct deserialization of value
+    # defining the method to ensure correct deserialization of value.
+    # Same {"value": ...} dict was stored when Field had __dict__, so older addressbooks load as well
     def __setstate__(self, state):
-        self.__dict__.update(state)
+        self.value = state["value"]
+
+# creates Field (or its subclass) object from already validated value, skipping validation in __init__.
+# Used when data comes from the saved addressbook, which only ever contains values that passed validation
+def _make_field(cls, value):
+    field = object.__new__(cls)
+    field.value = value
+    return field
 
-# Since classes Name, Phone and Birthday inherit from Field, they inherit the __getstate__ and __setstate__ methods
+# Since classes Name, Phone and Birthday inherit from Field, they inherit the __getstate__ and __setstate__ methods.
+# They declare empty __slots__ so their instances don't get __dict__ back
 
 class Name(Field):
     # This class represents the name of a contact, ensures it has a value attribute. Parent class is Field
+    __slots__ = ()
+
     def __init__(self, value):
         if not value.strip():
             raise ValueError("Name field cannot be empty.")
@@ -36,167 +68,244 @@ class Name(Field):
 
 class Phone(Field):
     # Phone class with validation to ensure the phone number contains exactly 10 digits. Parent class is Field
+    __slots__ = ()
+
     def __init__(self, value):
-        if not value.isdigit() or len(value) != 10:
+        # length is checked first, so wrong-length input is rejected without scanning its characters
+        if len(value) != 10 or not value.isdecimal():
             raise ValueError("Phone number must consist of 10 digits.")
         super().__init__(value)
 
 class Birthday(Field):
     # Birthday class with validation to ensure the date is in correct format. Data is stored in datetime format
+    __slots__ = ()
+
     def __init__(self, value):
+        # date always has fixed DD.MM.YYYY shape, so it's parsed with slicing instead of datetime.strptime
+        if len(value) != 10 or value[2] != "." or value[5] != "." or not (value[:2] + value[3:5] + value[6:]).isdigit():
+            raise ValueError("Invalid date format. Use DD.MM.YYYY")
         try:
-            birthday = datetime.strptime(value, "%d.%m.%Y").date()
-            super().__init__(birthday)
+            birthday = date(int(value[6:]), int(value[3:5]), int(value[:2]))
         except ValueError:
             raise ValueError("Invalid date format. Use DD.MM.YYYY")
+        super().__init__(birthday)
     
     # since Birthday class is datetime format, it's better to add __str__ and __repr__ methods
     def __str__(self):
-        return self.value.strftime("%d.%m.%Y")
+        return _format_date(self.value)
 
     def __repr__(self):
-        return self.value.strftime("%d.%m.%Y")
+        return _format_date(self.value)
 
 class Record:
     # This class holds a contact's information, including name and a list of phone numbers.
+    __slots__ = ("name", "_phones", "birthday")
+
     def __init__(self, name):
         self.name = Name(name) # Name object, ensuring the name is validated.
-        self.phones = [] # List to store multiple Phone objects.
+        self._phones = {} # Phone objects keyed by their value, so lookups don't need to scan or build Phone objects.
         self.birthday = None # by defauld birthday field is empty
 
+    # list of Phone objects in the order they were added, kept for code that works with record.phones
+    @property
+    def phones(self):
+        return list(self._phones.values())
+
     def add_phone(self, phone):
-        self.phones.append(Phone(phone))  # Adds a new Phone object after validation.
+        self._phones[phone] = Phone(phone)  # Adds a new Phone object after validation.
 
     def remove_phone(self, phone):
-        # Attempts to remove a phone number from the list; if not found, does nothing.
-        self.phones = [p for p in self.phones if p.value != phone]
+        # Removes a phone number in place with one dict lookup, no new list is built; if not found, does nothing.
+        self._phones.pop(phone, None)
 
     def edit_phone(self, old_phone, new_phone):
         # Edits an existing phone number; if not found, raises an error.
-        try:
-            # This will create a temporary Phone object and use it for comparison
-            index = self.phones.index(Phone(old_phone))
-            self.phones[index] = Phone(new_phone)
-        except ValueError:
+        if old_phone not in self._phones:
             raise ValueError("Old phone number not found.")
+        new = Phone(new_phone) # only the new number needs validation
+        # rebuilding the dict keeps edited number on the same position as the old one
+        self._phones = {(new_phone if key == old_phone else key): (new if key == old_phone else p)
+                        for key, p in self._phones.items()}
 
     def find_phone(self, phone):
         # Finds and returns a phone object; if not found, returns None.
-        for p in self.phones:
-            if p.value == phone:
-                return p
-        return None
+        return self._phones.get(phone)
     
     def add_birthday(self, birthday):
         self.birthday = Birthday(birthday)
 
+    # builds Record from already validated data: name string, phone strings and birthday as date (or None)
+    @classmethod
+    def _unchecked(cls, name, phones, birthday):
+        record = object.__new__(cls)
+        record.name = _make_field(Name, name)
+        record._phones = {phone: _make_field(Phone, phone) for phone in phones}
+        record.birthday = _make_field(Birthday, birthday) if birthday else None
+        return record
+
     # adding birthday to str method in record
     def __str__(self):
-        phones_str = '; '.join(p.value for p in self.phones)
+        phones_str = '; '.join(self._phones)
         birthday_str = f", Birthday: {self.birthday}" if self.birthday else ""
         return f"Contact name: {self.name.value}, Phones: {phones_str}{birthday_str}"
     
     # defining the method to ensure correct serialization of Record values
     def __getstate__(self):
-        return self.__dict__
+        return {slot: getattr(self, slot) for slot in self.__slots__}
     
-    # defining the method to ensure correct deserialization of Record values   
+    # defining the method to ensure correct deserialization of Record values.
+    # Addressbooks saved before phones were kept in a dict store them as a "phones" list, it's converted here
     def __setstate__(self, state):
-        self.__dict__.update(state)
+        if "phones" in state:
+            state["_phones"] = {p.value: p for p in state.pop("phones")}
+        for slot, value in state.items():
+            setattr(self, slot, value)
 
-# Since classe AddressBook inherit from UserDict, it will rely on the default serialization behavior of the dictionary. 
-# __getstate__ and __setstate__ method don't need to be defined
-class AddressBook(UserDict):
+# ordinal of birthday (month, day) in the given year
+def _birthday_ordinal(year, month, day):
+    try:
+        return date(year, month, day).toordinal()
+    except ValueError:
+        return date(year, 3, 1).toordinal() # 29th of February in a non-leap year is celebrated on 1st of March
+
+# date math of the birthdays command, kept apart from AddressBook so it only works with plain integers.
+# today's year and ordinal are computed once per command.
+# Returns ordinal of congratulation date if birthday (month, day) is within upcoming days, otherwise None
+def _scan_birthday(month, day, today_year, today_ord, days):
+    birthday_ord = _birthday_ordinal(today_year, month, day)
+    # if birthday this year already passed we will consider date of birthday next year
+    if birthday_ord < today_ord:
+        birthday_ord = _birthday_ordinal(today_year + 1, month, day)
+    # if birthday is withing upcoming 7 (or other) days, congratulation date is returned
+    if birthday_ord - today_ord > days:
+        return None
+    # adjusting for weekend - if bithsay ison weekend, congratulation date is switched to the next Monday.
+    # Ordinal 1 (01.01.0001) is Monday, so weekday is counted from ordinal directly
+    weekday = (birthday_ord + 6) % 7
+    if weekday >= 5:
+        birthday_ord += 7 - weekday # for how many days we need to switch date of congratulation
+    return birthday_ord
+
+# AddressBook inherits from dict directly, so records are read and written without going through self.data
+class AddressBook(dict):
     # Manages a collection of Record objects, providing methods to manipulate them.
     def add_record(self, record: Record):
-        if record.name.value in self.data:
+        # setdefault inserts and checks for existing name with one dict lookup
+        if self.setdefault(record.name.value, record) is not record:
             raise ValueError("Record with this name already exists.")
-        self.data[record.name.value] = record
+
+    # fills addressbook from already validated (name, phones, birthday) rows, see Record._unchecked
+    def _bulk_load(self, rows):
+        for name, phones, birthday in rows:
+            self[name] = Record._unchecked(name, phones, birthday)
 
     def find(self, name):
-        return self.data.get(name)
+        return self.get(name)
 
     def delete(self, name):
-        if name in self.data:
-            del self.data[name]
+        if name in self:
+            del self[name]
         else:
             raise KeyError("Record not found.")
     
     def get_upcoming_birthdays(self, days=7):
         upcoming_birthdays = []
         today = date.today()
-        for record in self.data.values():
+        today_ord = today.toordinal()
+        for record in self.values():
             # if birthday is not indicated in the record, it will be skipped 
             if record.birthday:
-                birthday_this_year = record.birthday.value.replace(year=today.year)
-                # if birthday this year already passed we will consider date of birthday next year
-                if birthday_this_year < today:
-                    birthday_this_year = birthday_this_year.replace(year=today.year + 1)
-                # if birthday is withing upcoming 7 (or other) days, record will be added to the list
-                if 0 <= (birthday_this_year - today).days <= days:
-                    # adjusting for weekend - if bithsay ison weekend, congratulation date is switched to the next Monday
-                    if birthday_this_year.weekday() >= 5:
-                        days_ahead = 7 - birthday_this_year.weekday() # for how many days we need to switch date of congratulation
-                        congratulation_date = (birthday_this_year + timedelta(days=days_ahead)).strftime("%d.%m.%Y")
-                    else:
-                        congratulation_date = birthday_this_year.strftime("%d.%m.%Y")
+                birthday = record.birthday.value
+                congratulation_ord = _scan_birthday(birthday.month, birthday.day, today.year, today_ord, days)
+                if congratulation_ord is not None:
+                    congratulation_date = _format_date(date.fromordinal(congratulation_ord))
                     upcoming_birthdays.append({"name": record.name.value, "congratulation date": congratulation_date})
         return upcoming_birthdays
 
+    # yields output of "all" command line by line, so it can be written out without building one big string
+    def iter_lines(self):
+        for record in self.values():
+            yield str(record)
+            yield "\n"
+
     def __str__(self):
-        return '\n'.join(str(record) for record in self.data.values())
+        return '\n'.join(map(str, self.values()))
+
+    # addressbooks pickled by previous versions, when AddressBook was a UserDict, keep records in "data" attribute
+    def __setstate__(self, state):
+        self.update(state.get("data", {}))
 
 def main():
     contact_book = load_data() # opening last condition of addressbook or creates empty Addressbook
+    setup_readline(contact_book)
     print("Welcome to the assistant bot!")
     while True:
         user_input = input("Enter a command: ")
-        command, *args = parse_input(user_input)
-        if command in ["close", "exit"]:
+        command, args = parse_input(user_input)
+        if command in EXITS:
             save_data(contact_book) # before closing the session contact_book condition is saved
             print("Good bye!")
             break
-        elif command == "hello":
-            print("How can I help you?")
-        elif command == "add":
-            print(add_contact(args, contact_book))
-        elif command == "change":
-            print(change_contact(args, contact_book))
-        elif command == "phone":
-            print(show_phone(args, contact_book))
-        elif command == "all":
-            print(show_all(contact_book))
-        elif command == "add-birthday":
-            print(add_birthday(args, contact_book))
-        elif command == "show-birthday":
-            print(show_birthday(args, contact_book))
-        elif command == "birthdays":
-            print(birthdays(contact_book))
-        else:
-            print("Invalid command.")
+        handler = DISPATCH.get(command)
+        result = handler(args, contact_book) if handler else "Invalid command."
+        if result is not None: # None means handler already printed its output by itself
+            print(result)
         
-def parse_input(user_input):
-    cmd, *args = user_input.split()
-    cmd = cmd.strip().lower()
-    return cmd, args
+# loads command history of previous sessions and enables tab-completion:
+# command names for the first word, contact names for the rest
+def setup_readline(contact_book: AddressBook):
+    if readline is None:
+        return
+    try:
+        readline.read_history_file(HISTORY_FILE)
+    except OSError: # no history yet at the first session
+        pass
+    atexit.register(readline.write_history_file, HISTORY_FILE)
 
-def input_error_add(func): # decorator to work with Errors in add command
-    @wraps(func)
-    def inner(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except ValueError as e: 
-            return str(e) # if phone is provided in wrong format
-        except IndexError:
-            return "Give me name and phone please." # if user didn't provide needed arguments with a command 
-    return inner
-
-@input_error_add
+    def complete(text, state):
+        options = DISPATCH.keys() | EXITS if readline.get_begidx() == 0 else contact_book.keys()
+        matches = sorted(option for option in options if option.startswith(text))
+        return matches[state] if state < len(matches) else None
+
+    readline.set_completer(complete)
+    readline.set_completer_delims(" \t\n") # words are split by whitespace only, so "add-birthday" completes as a whole
+    readline.parse_and_bind("tab: complete")
+
+MAX_ARGS = 3 # no command takes more than 3 arguments (change: name, old phone, new phone)
+
+def parse_input(user_input):
+    # split() already strips whitespace. Splitting stops after MAX_ARGS arguments, the rest of the line is ignored,
+    # so a long input isn't split into a huge list
+    parts = user_input.split(maxsplit=MAX_ARGS + 1)
+    if not parts: # empty input
+        return "", []
+    return parts[0].lower(), parts[1:MAX_ARGS + 1]
+
+# messages returned when user didn't provide needed arguments with a command
+ADD_ARGS_ERROR = "Give me name and phone please."
+CHANGE_ARGS_ERROR = "Give me name, old phone and new phone please."
+NAME_ARGS_ERROR = "Give me name please."
+ADD_BIRTHDAY_ARGS_ERROR = "Give me name and birthday please."
+
+def input_error(index_message): # decorator factory to work with Errors in commands
+    def decorator(func):
+        @wraps(func)
+        def inner(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except ValueError as e:
+                return str(e) # if data is provided in wrong format
+            except IndexError:
+                return index_message # if user didn't provide needed arguments with a command
+        return inner
+    return decorator
+
+@input_error(ADD_ARGS_ERROR)
 def add_contact(args: list, contact_book: AddressBook):
     phone = Phone(args[1]) # convirting to Phone format and checking if data is provided correctly
     name = args[0] # convirting to Name format
-    if name in contact_book:
-        record = contact_book.find(name)
+    record = contact_book.find(name) # one lookup both checks and gets the contact
+    if record:
         record.add_phone(phone.value)
         return "New phone added to contact"
     else:
@@ -205,18 +314,7 @@ def add_contact(args: list, contact_book: AddressBook):
         contact_book.add_record(record)
         return "Contact added"
 
-def input_error_change(func): # decorator to work with Errors in change command
-    @wraps(func)
-    def inner(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except ValueError as e:
-            return str(e) 
-        except IndexError:
-            return "Give me name, old phone and new phone please." # if user didn't provide needed arguments with a command 
-    return inner
-
-@input_error_change
+@input_error(CHANGE_ARGS_ERROR)
 def change_contact(args: list, contact_book: AddressBook):
     name = args[0]
     old_phone = Phone(args[1])
@@ -228,16 +326,7 @@ def change_contact(args: list, contact_book: AddressBook):
     else:
         return f"There is no {name} in contact book."
 
-def input_error_show(func): # decorator to work with Errors in phone command
-    @wraps(func)
-    def inner(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except IndexError:
-            return "Give me name please." # if user didn't provide needed arguments with a command 
-    return inner
-
-@input_error_show
+@input_error(NAME_ARGS_ERROR)
 def show_phone(args: list, contact_book: AddressBook):
     name = args[0]
     record = contact_book.find(name)
@@ -247,44 +336,24 @@ def show_phone(args: list, contact_book: AddressBook):
         return f"There is no {name} in contact book."
 
 # in show_all function we don't need decorator, since typically no Errors are possible
-def show_all(contact_book: AddressBook):
+def show_all(args: list, contact_book: AddressBook):
     if contact_book: 
-        return contact_book
+        sys.stdout.writelines(contact_book.iter_lines()) # records are streamed to the console one by one
     else:
         return "Contact book is empty"
 
-def input_error_add_birthday(func): # decorator to work with Errors in phone command
-    @wraps(func)
-    def inner(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except IndexError:
-            return "Give me name and birthday please." # if user didn't provide needed arguments with a command 
-        except ValueError as e:
-            return str(e)
-    return inner
-
-@input_error_add_birthday
+@input_error(ADD_BIRTHDAY_ARGS_ERROR)
 def add_birthday(args: list, contact_book: AddressBook):
     name = args[0]
     birthday = Birthday(args[1])
     if name in contact_book:
         record = contact_book.find(name)
-        record.add_birthday(birthday.value)
+        record.add_birthday(args[1]) # Record expects birthday as DD.MM.YYYY string, same as user input
         return "Birthday added"
     else:
         return f"There is no {name} in contact book."
 
-def input_error_show_birthday(func):
-    @wraps(func)
-    def inner(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except IndexError:
-            return "Give me name please."
-    return inner
-
-@input_error_show_birthday
+@input_error(NAME_ARGS_ERROR)
 def show_birthday(args, contact_book: AddressBook):
     name = args[0]
     if name in contact_book:
@@ -296,21 +365,59 @@ def show_birthday(args, contact_book: AddressBook):
     else:
         return f"There is no {name} in contact book."
 
-def birthdays(contact_book: AddressBook):
+def birthdays(args: list, contact_book: AddressBook):
     return contact_book.get_upcoming_birthdays()
 
-# saves addressbook condition to the file
-def save_data(book: AddressBook, filename="addressbook.pkl"):
-    with open(filename, "wb") as f:
-        pickle.dump(book, f)
-
-# loads last condition of addressbook or creates an addressbook at the first session
-def load_data(filename="addressbook.pkl"):
+def hello(args: list, contact_book: AddressBook):
+    return "How can I help you?"
+
+# all command handlers take the same (args, contact_book) arguments, so main() finds them with one dict lookup
+DISPATCH = {
+    "hello": hello,
+    "add": add_contact,
+    "change": change_contact,
+    "phone": show_phone,
+    "all": show_all,
+    "add-birthday": add_birthday,
+    "show-birthday": show_birthday,
+    "birthdays": birthdays,
+}
+EXITS = {"close", "exit"}
+
+# saves addressbook condition to the file as plain JSON: {name: {"phones": [...], "birthday": "DD.MM.YYYY" or null}}.
+# Snapshot is written to a temporary file first and then renamed, so an interrupted save never leaves a half-written addressbook behind
+def save_data(book: AddressBook, filename="addressbook.json"):
+    payload = {
+        name: {"phones": [p.value for p in record.phones], "birthday": str(record.birthday) if record.birthday else None}
+        for name, record in book.items()
+    }
+    tmp_filename = filename + ".tmp"
+    with open(tmp_filename, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp_filename, filename)
+
+# loads last condition of addressbook or creates an addressbook at the first session.
+# If there is no JSON file yet, addressbook saved with pickle by previous versions of the bot is loaded
+def load_data(filename="addressbook.json", legacy_filename="addressbook.pkl"):
     try:
-        with open(filename, "rb") as f:
-            return pickle.load(f)
+        with open(filename, "r", encoding="utf-8") as f:
+            payload = json.load(f)
     except FileNotFoundError:
-        return AddressBook()
+        try:
+            with open(legacy_filename, "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return AddressBook()
+    book = AddressBook()
+    book._bulk_load(
+        (name, fields["phones"], _parse_saved_date(fields["birthday"]) if fields["birthday"] else None)
+        for name, fields in payload.items()
+    )
+    return book
+
+# birthdays are saved as DD.MM.YYYY, which is sliced straight into date since it was validated before saving
+def _parse_saved_date(value):
+    return date(int(value[6:]), int(value[3:5]), int(value[:2]))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file